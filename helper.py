@@ -3,26 +3,184 @@ Python file that contains helper functions for the tool and its functionality; t
 """
 
 # Import the necessary libraries/packages
+import os
+import hashlib
+import json
+import warnings
 import pandas as pd
+import numpy as np
 import streamlit as st
 import geopandas as gpd
+import shapely
+import folium
+
+# The motive power values (in addition to any plug-in hybrids) that are counted as electric vehicles
+ELECTRIC_MOTIVE_POWERS = {"ELECTRIC", "ELECTRIC [PETROL EXTENDED]", "ELECTRIC FUEL CELL HYDROGEN"}
+
+# The plot time strings of the 48 half-hour trading periods in a day (built once on import, rather than on every Streamlit rerun)
+HALF_HOUR_TIMES = [f"{i // 2:02d}:{(i % 2) * 30:02d}" for i in range(48)]
+
+# The errors that are expected when reading or saving a copy of a processed file (e.g. a missing, corrupt or unwritable copy, no Parquet engine, or column types
+# that Parquet cannot store), which are handled by warning and falling back to processing the original file
+CACHE_READ_ERRORS = (OSError, ValueError, ImportError)
+CACHE_WRITE_ERRORS = (OSError, ValueError, TypeError, NotImplementedError, ImportError)
+
+# The generation data columns of the 48 regular trading periods in a day, in order (TP49 and TP50 only occur on daylight saving days, so are not used)
+TP_COLS = [f"TP{i}" for i in range(1, 49)]
+
+# A manual mapping of network supply points to grid zones for handling edge or unexpected cases, such as where a supply point does not lie within any region
+POC_REGION_OVERRIDES = {
+    "HRP2201": "Central North Island",
+    "JRD1101": "Lower North Island",
+    "TAB0331": "Central North Island",
+    "TAB2201": "Central North Island",
+    "BEN2202": "Lower South Island"
+}
+
+def get_slot_profile(slot_weights):
+    """
+    Function that builds a normalised profile over the 48 half-hour slots of a day, for distributing new supply or demand
+
+    slot_weights: A list of (start slot, end slot, weight) tuples, where the slots from the start up to (but not including) the end are given the weight
+
+    Returns: A NumPy array of the weight of each slot, normalised to sum to 1
+    """
+    profile = np.zeros(48)
+    for start_slot, end_slot, weight in slot_weights:
+        profile[start_slot:end_slot] = weight
+
+    return profile / profile.sum()
+
+# The profiles of new wind and solar supply, where wind is assumed to be available all day and solar from 9am-5pm
+WIND_PROFILE = get_slot_profile([(0, 48, 1)])
+SOLAR_PROFILE = get_slot_profile([(18, 34, 1)])
+
+# The EV charging profile of each charging scenario - status-quo night charging is during 18:00-24:00 and 00:00-07:00, and daytime charging is during 9:00-17:00
+CHARGING_PROFILES = {
+    "Status-quo": get_slot_profile([(36, 48, 1), (0, 14, 1)]),
+    "Daytime-priority": get_slot_profile([(18, 34, 1)])
+}
+
+# The EV charging profile for non-compliance - assume that users prefer charging when they are at home, with some charging around work-hours
+NON_COMPLIANT_PROFILE = get_slot_profile([(36, 48, 0.75), (0, 14, 0.75), (14, 36, 0.25)])
+
+def get_parquet_cache_path(path, read_kwargs):
+    """
+    Function that gets the path of the Parquet copy of a CSV file, which depends on the arguments the file was read with
+
+    path: Path to the CSV file
+    read_kwargs: A dictionary of all the arguments used to read the CSV file
+
+    Returns: The path to the Parquet copy of the file
+    """
+    read_key = repr(sorted((key, repr(value)) for key, value in read_kwargs.items()))
+    return f"{path}.{hashlib.md5(read_key.encode('utf-8')).hexdigest()[:8]}.parquet"
 
 @st.cache_resource
-def load_file(path, num_skip_rows=0): 
+def load_file(path, num_skip_rows=0, usecols=None, dtype=None, parse_dates=None): 
     """
-    Function that loads in a CSV file as a Pandas dataframe (with basic error-handling)
+    Function that loads in a CSV file as a Pandas dataframe (with basic error-handling), using a Parquet copy of the file where possible
 
     path: Path to the file to be read in
+    num_skip_rows: The number of rows at the start of the file to skip
+    usecols: An optional list of the only columns to be read in
+    dtype: An optional dictionary mapping columns to the types they should be read in as
+    parse_dates: An optional list of columns to be parsed as dates
 
     Returns: A dataframe containing the data from the file
     """
+    # Get the Parquet copy of the file from every argument of this function (taken together before anything else is defined), so that adding or
+    # changing a parameter can never reuse a copy that was saved with different arguments
+    cache_path = get_parquet_cache_path(path, dict(locals()))
+
+    read_kwargs = {"skiprows": num_skip_rows, "usecols": usecols, "dtype": dtype, "parse_dates": parse_dates}
+
+    # Read from the Parquet copy of the file if it is up-to-date, as this avoids having to parse the CSV text and infer its types again
+    # (a copy that cannot be read is replaced below, once the CSV file has been parsed)
+    try:
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            return pd.read_parquet(cache_path)
+    except CACHE_READ_ERRORS as e:
+        warnings.warn(f"Could not read the Parquet copy of {path}, so the CSV file will be parsed instead: {e}")
+
+    # Parse the file with the (multithreaded) PyArrow engine, falling back to the C engine for any files that PyArrow cannot handle (e.g. ragged rows),
+    # or for environments without PyArrow - files with rows to skip always use the C engine, as Pandas passes them to PyArrow as rows to skip after the header
+    df = None
+    if num_skip_rows == 0:
+        try:
+            df = pd.read_csv(path, engine="pyarrow", **read_kwargs)
+        except (OSError, ValueError, KeyError, ImportError) as e:
+            warnings.warn(f"Could not parse {path} with the PyArrow engine, so the C engine will be used instead: {e}")
+
+    if df is None:
+        try:
+            df = pd.read_csv(path, engine="c", low_memory=False, **read_kwargs)
+        except (OSError, ValueError) as e:
+            st.warning(f"Invalid file with path: {path} ({e})")
+            return pd.DataFrame()
+
+    # Save a Parquet copy of the file for future startups (failing to do so should not prevent the data from being used)
+    try:
+        df.to_parquet(cache_path, index=False)
+    except CACHE_WRITE_ERRORS as e:
+        warnings.warn(f"Could not save a Parquet copy of {path}: {e}")
+
+    return df
+
+
+def load_demand_data(data_dir, is_territorial_view):
+    """
+    Function that loads in the electricity demand data for the current map view, which is either per grid zone or per network node (for mapping to the territorial authorities)
+
+    data_dir: The directory that contains the data files
+    is_territorial_view: A bool representing if the current map view has been set to show electricity grid zones or territorial authorities
+
+    Returns: The demand dataframe, with "Period start", "Demand (GWh)" and region ("Region" for grid zones, or "Region ID" for network nodes) columns
+    """
+    # Get the demand file and the column that identifies the region of each row, depending on the current map view
+    if is_territorial_view == False:
+        demand_path = f"{data_dir}Demand_trends_zone_202503.csv"
+        region_col = "Region"
+    elif is_territorial_view == True:
+        demand_path = f"{data_dir}Demand_trends_node_202503.csv"
+        region_col = "Region ID"
+
+    # Load only the needed columns, with the repeated key columns as categories and the demand as float32 (the load itself is cached per file)
+    return load_file(
+        demand_path,
+        11,
+        usecols=["Period start", region_col, "Demand (GWh)"],
+        dtype={"Period start": "category", region_col: "category", "Demand (GWh)": "float32"}
+    )
+
+
+def load_file_chunked(path, filter_fn, chunksize=500_000, usecols=None, dtype=None):
+    """
+    Function that loads in a (large) CSV file as a Pandas dataframe in chunks, filtering each chunk before it is kept so that the whole file is never held in memory at once
+
+    path: Path to the file to be read in
+    filter_fn: A function that takes a chunk of the file as a dataframe, and returns the processed/filtered chunk to be kept
+    chunksize: The number of rows to read in for each chunk
+    usecols: An optional list of the only columns to be read in
+    dtype: An optional dictionary mapping columns to the types they should be read in as 
+
+    Returns: A dataframe containing the filtered data from the file
+    """
     try:
-        df = pd.read_csv(path, skiprows=num_skip_rows)
-        return df
-    except Exception:
-        st.warning(f"Invalid file with path: {path}")
+        chunks = [filter_fn(chunk) for chunk in pd.read_csv(path, chunksize=chunksize, usecols=usecols, dtype=dtype, engine="c")]
+    except (OSError, ValueError) as e:
+        st.warning(f"Invalid file with path: {path} ({e})")
         return pd.DataFrame()
 
+    df = pd.concat(chunks, ignore_index=True, copy=False)
+
+    # Each chunk has its own set of categories, so restore any categorical columns (which become object columns when concatenated)
+    for col, col_dtype in (dtype or {}).items():
+        if col_dtype == "category" and col in df.columns:
+            df[col] = df[col].astype("category")
+
+    return df
+
 
 def get_electric_mask(df):
     """
@@ -30,123 +188,524 @@ def get_electric_mask(df):
 
     df: Dataframe to be processed
 
-    Returns: The appropriate mask
+    Returns: The appropriate mask, as a boolean NumPy array
     """
-    electric_mask = (df["MOTIVE_POWER"].isin(["ELECTRIC", "ELECTRIC [PETROL EXTENDED]", "ELECTRIC FUEL CELL HYDROGEN"])) | (df["MOTIVE_POWER"].str.contains("PLUGIN", na=False))
+    # Work on the categorical codes of the (low-cardinality) motive power column, so only the categories themselves need to be checked as strings
+    motive_power = df["MOTIVE_POWER"]
+    if not isinstance(motive_power.dtype, pd.CategoricalDtype):
+        motive_power = motive_power.astype("category")
+
+    categories = motive_power.cat.categories
+    electric_cat_idx = np.array([i for i, category in enumerate(categories) if category in ELECTRIC_MOTIVE_POWERS or "PLUGIN" in category], dtype=np.int16)
+
+    electric_mask = np.isin(motive_power.cat.codes.to_numpy(), electric_cat_idx)
     return electric_mask
 
 @st.cache_resource
-def get_cleaned_fleet_df(fleet_path, ta_region_map):
+def get_cleaned_fleet_df(fleet_path, _ta_region_map):
     """
     Function that processes and maps the fleet dataframe to the regions so that caching works as expected 
 
     fleet_path: The filepath to the fleet data file
-    ta_region_map: The GeoJSON file showing the territorial authorities in New Zealand
+    _ta_region_map: The mapping of territorial authorities to regions (not hashed by Streamlit, as it is derived from the static map files)
 
     Returns: The processed dataframe
 
     """
+    # Reuse the saved cleaned data if it is up-to-date, where the saved copy depends on the mapping it was cleaned with (as well as the fleet file itself)
+    map_key = hashlib.md5(json.dumps(_ta_region_map.to_dict(), sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    cache_path = f"{fleet_path}.cleaned.{map_key}.parquet"
+    try:
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(fleet_path):
+            return pd.read_parquet(cache_path)
+    except CACHE_READ_ERRORS as e:
+        warnings.warn(f"Could not read the cleaned copy of {fleet_path}, so the fleet data will be cleaned again: {e}")
+
+    def clean_chunk(chunk):
+        # Apply the mapping (to the categories of the TLA column, rather than to every row), then remove invalid and ambiguous fleet data
+        chunk["REGION"] = chunk["TLA"].map(_ta_region_map)
+        chunk = chunk[chunk["REGION"].notna()]
+        chunk = chunk[chunk["MOTIVE_POWER"] != "OTHER"]
+        return chunk
+
+    # Load only the needed columns (with compact types) in chunks, so that only the cleaned rows are kept in memory
+    raw_df = load_file_chunked(
+        fleet_path,
+        clean_chunk,
+        usecols=["MOTIVE_POWER", "GROSS_VEHICLE_MASS", "TLA"],
+        dtype={"GROSS_VEHICLE_MASS": "float32", "MOTIVE_POWER": "category", "TLA": "category"}
+    )
+
+    # Store the mapped regions as categories too (as the mapping is many-to-one, it returns plain strings), so that grouping by region uses integer codes
+    raw_df["REGION"] = raw_df["REGION"].astype("category")
+
+    # Compute the electric mask once for the whole fleet and store it, so that it can be reused by any later summaries
+    raw_df["_electric"] = get_electric_mask(raw_df)
+
+    # Save the cleaned data for future startups (failing to do so should not prevent the data from being used)
+    if not raw_df.empty:
+        try:
+            raw_df.to_parquet(cache_path, index=False)
+        except CACHE_WRITE_ERRORS as e:
+            warnings.warn(f"Could not save a cleaned copy of {fleet_path}: {e}")
+
+    return raw_df
 
-    # Load and apply mapping
-    raw_df = load_file(fleet_path)
-    raw_df["REGION"] = raw_df["TLA"].map(ta_region_map)
+def count_fleet_categories(region_codes, electric, heavy, num_regions):
+    """
+    Function that counts the number of vehicles in each (electric, heavy) category for every region, in a single pass over the fleet
 
-    # Remove invalid and ambiguous fleet data
-    raw_df = raw_df[raw_df["REGION"].notna()].copy()
-    raw_df = raw_df[raw_df["MOTIVE_POWER"] != "OTHER"]
+    region_codes: An integer NumPy array of the region code of each vehicle
+    electric: A boolean NumPy array showing if each vehicle is electric
+    heavy: A boolean NumPy array showing if each vehicle is heavy (over 3500kg)
+    num_regions: The total number of regions
 
-    return raw_df
+    Returns: A (num_regions, 4) count matrix, where the columns are light combustion, heavy combustion, light electric, and heavy electric vehicles
+    """
+    # Pack each vehicle's two booleans into a 2-bit category code, then combine it with the region code so that all the counts come from a single bincount
+    category_codes = (electric.astype(np.uint8) << 1) | heavy.astype(np.uint8)
+    keys = region_codes.astype(np.int64) * 4 + category_codes
+
+    counts = np.bincount(keys, minlength=num_regions * 4).reshape(num_regions, 4)
+
+    return counts
 
 @st.cache_resource
-def build_region_fleet_summary(fleet_df, is_territorial_view):
+def build_region_fleet_summary(_fleet_df, fleet_path, is_territorial_view):
     """
     Function that creates a summary dataframe of the New Zealand vehicle fleet composition and information by region, for use in the interactive configuration
 
-    fleet_df: The dataframe describing the fleet
+    _fleet_df: The dataframe describing the fleet (not hashed by Streamlit, as it is cached from the static fleet file)
+    fleet_path: The filepath to the fleet data file that the fleet dataframe was loaded from, for identifying the summary in the cache
 
     is_territorial_view: A bool representing if the current map view has been set to show electricity grid zones or territorial authorities
 
     Returns: A dataframe representing the summarised information
     """
-    # Get the list of regions that the vehicles could be associated with from the dataframe
+    # Get the column that the vehicles should be grouped by, depending on the current map view
     if is_territorial_view == False:
         region_col = "REGION"
     elif is_territorial_view == True:
         region_col = "TLA"
-    
-    vehicle_regions = fleet_df[region_col].unique()
 
-    # For each region, create a row that contains information about the size and characteristics/composition of the vehicles in that region
-    rows_list = []
+    # Extract the fleet data needed for the counts as plain NumPy arrays, ignoring vehicles with an unknown mass (or region) as they cannot be categorised
+    gross_vehicle_mass = _fleet_df["GROSS_VEHICLE_MASS"].to_numpy()
+    region_codes, regions = pd.factorize(_fleet_df[region_col])
+    electric = _fleet_df["_electric"].to_numpy()
 
-    for region in vehicle_regions:
-        filtered_fleet_df = fleet_df[fleet_df[region_col] == region]
+    is_known = ~pd.isna(gross_vehicle_mass) & (region_codes >= 0)
 
-        # Filter to get different relevant values such as the total electric vehicles in the given region
-        electric_mask = get_electric_mask(filtered_fleet_df)
-        num_light_electric_vehicles = filtered_fleet_df[(electric_mask) & (filtered_fleet_df["GROSS_VEHICLE_MASS"] <= 3500)].shape[0]
-        num_heavy_electric_vehicles = filtered_fleet_df[(electric_mask) & (filtered_fleet_df["GROSS_VEHICLE_MASS"] > 3500)].shape[0]
+    counts_arr = count_fleet_categories(region_codes[is_known], electric[is_known], gross_vehicle_mass[is_known] > 3500, len(regions))
 
-        num_light_combustion_vehicles = filtered_fleet_df[(~electric_mask) & (filtered_fleet_df["GROSS_VEHICLE_MASS"] <= 3500)].shape[0]
-        num_heavy_combustion_vehicles = filtered_fleet_df[(~electric_mask) & (filtered_fleet_df["GROSS_VEHICLE_MASS"] > 3500)].shape[0]
+    # Reorder the category columns to match the expected layout (light electric, heavy electric, light combustion, heavy combustion)
+    counts_arr = counts_arr[:, [2, 3, 0, 1]]
 
-        # Add to the appropriate temporary list
-        rows_list.append({
-            "Region": region,
-            "Light Electric Vehicle Count": num_light_electric_vehicles,
-            "Heavy Electric Vehicle Count": num_heavy_electric_vehicles,
-            "Light Combustion Vehicle Count": num_light_combustion_vehicles,
-            "Heavy Combustion Vehicle Count": num_heavy_combustion_vehicles
-        })
-    # Process as appropriate (including handling vehicles for the whole of New Zealand)
-    summary_df = pd.DataFrame(rows_list).set_index("Region")
-    totals_row = summary_df.sum()
+    # Process as appropriate (including handling vehicles for the whole of New Zealand), appending the totals row in NumPy to build the dataframe in one go
+    totals_row = counts_arr.sum(axis=0, keepdims=True)
 
-    summary_df.loc["NEW ZEALAND"] = totals_row
+    summary_df = pd.DataFrame(
+        np.vstack([counts_arr, totals_row]),
+        index=pd.Index(list(regions) + ["NEW ZEALAND"], name="Region"),
+        columns=["Light Electric Vehicle Count", "Heavy Electric Vehicle Count", "Light Combustion Vehicle Count", "Heavy Combustion Vehicle Count"]
+    )
 
     return summary_df
 
 @st.cache_resource
-def get_avg_profiles(day_index, supply_df, demand_df):
+def get_region_fleet_counts(_region_fleet_df, is_territorial_view):
+    """
+    Function that converts the fleet summary dataframe into a dictionary of plain vehicle counts per region, for fast lookups of the selected region
+
+    _region_fleet_df: The fleet summary dataframe, as returned by build_region_fleet_summary (not hashed by Streamlit)
+    is_territorial_view: A bool representing if the current map view has been set to show electricity grid zones or territorial authorities
+
+    Returns: A dictionary mapping each (uppercase) region name to a tuple of its light electric, heavy electric, light combustion and heavy combustion vehicle counts
+    """
+    return {region: tuple(int(count) for count in counts) for region, *counts in _region_fleet_df.itertuples(name=None)}
+
+def get_percentage(count, total):
+    """
+    Function that calculates a vehicle count as a percentage of a total, for the fleet shares of the selected region
+
+    count: The number of vehicles to get the percentage of
+    total: The total number of vehicles
+
+    Returns: The percentage as a float, which is 0 if the total is 0 (e.g. for the heavy EV share of a region with no heavy vehicles)
+    """
+    if total == 0:
+        return 0.0
+
+    return (count / total) * 100
+
+def get_profile_matrix(df):
+    """
+    Function that converts a wide supply or demand dataframe (with one row per trading date) into NumPy arrays, for efficiently computing the average profiles
+
+    df: The processed electricity supply or demand dataframe, with a "Trading_Date" column and a numeric column for each trading period
+
+    Returns: The weekday index of each trading date (where 0 is Monday) as an int8 array, and a (C-contiguous) float32 matrix of the trading period values with one row per date
     """
-    Function that gets the average supply and demand profiles for a given region and weekday index
+    # Get the numeric columns from the column types directly, to avoid building a filtered copy of the dataframe
+    numeric_cols = [col for col, col_dtype in df.dtypes.items() if pd.api.types.is_numeric_dtype(col_dtype)]
 
-    day_index: The array index that corresponds to the user-selected day of the week to be profiled
-    supply_df: The processed electricity supply dataframe
-    demand_df: The processed electricity demand dataframe
+    # Get the weekday of each date once, from its number of days since the epoch (1 January 1970 was a Thursday, i.e. weekday index 3)
+    dates = df["Trading_Date"].to_numpy(dtype="datetime64[D]")
+    day_of_week = ((dates.view("int64") - 4) % 7).astype(np.int8)
 
-    Returns: The average electricity supply and demand profiles
+    values = np.ascontiguousarray(df[numeric_cols].to_numpy(dtype=np.float32))
+
+    return day_of_week, values
+
+def get_weekday_profiles(day_of_week, values):
+    """
+    Function that averages a supply or demand profile matrix over the rows of each weekday, in a single pass over the matrix
+
+    day_of_week: The int8 array of the weekday index of each row
+    values: The float32 matrix of trading period values, with one row per date
+
+    Returns: A (7, number of trading periods) matrix containing the average value of each trading period for each weekday (where row 0 is Monday),
+    ignoring missing values as Pandas does
+    """
+    num_cols = values.shape[1]
+    is_known = ~np.isnan(values)
+
+    # Combine each value's weekday with its column into a single key, so that the sums and counts of the non-missing values of every weekday each come from
+    # a single bincount (as with the fleet counts), then take the mean where columns with no values are left as NaN
+    keys = (day_of_week.astype(np.int64)[:, None] * num_cols + np.arange(num_cols)).ravel()
+    sums = np.bincount(keys, weights=np.where(is_known, values, 0).ravel(), minlength=7 * num_cols).reshape(7, num_cols)
+    counts = np.bincount(keys, weights=is_known.ravel(), minlength=7 * num_cols).reshape(7, num_cols)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weekday_profiles = sums / counts
+
+    return weekday_profiles
+
+@st.cache_resource
+def get_avg_profiles(supply_matrix, demand_matrix):
     """
+    Function that gets the average supply and demand profiles of every weekday for a given region, so that changing the selected weekday is just a row lookup
 
-    # Convert the columns in the dataframes for date information to the correct and consistent format
-    supply_df["Trading_Date"] = pd.to_datetime(supply_df["Trading_Date"])
-    demand_df["Trading_Date"] = pd.to_datetime(demand_df["Trading_Date"])
+    supply_matrix: The (weekdays, values) arrays for the processed electricity supply data, as returned by get_profile_matrix
+    demand_matrix: The (weekdays, values) arrays for the processed electricity demand data, as returned by get_profile_matrix
 
-    supply_avg = supply_df[supply_df["Trading_Date"].dt.dayofweek == day_index].select_dtypes(include="number").mean(axis=0)
-    demand_avg = demand_df[demand_df["Trading_Date"].dt.dayofweek == day_index].select_dtypes(include="number").mean(axis=0)
+    Returns: The (7, number of trading periods) average electricity supply and demand profile matrices, as NumPy arrays (indexed by weekday, where 0 is Monday)
+    """
+
+    supply_avg = get_weekday_profiles(*supply_matrix)
+    demand_avg = get_weekday_profiles(*demand_matrix)
 
     return demand_avg, supply_avg
 
+def get_selected_region_data(region_data, selected_region):
+    """
+    Function that gets the supply or demand data of the selected region, from the dictionary returned by get_supply_by_region or get_demand_by_region
+
+    region_data: The dictionary mapping each region name (and "New Zealand") to its supply or demand dataframe
+    selected_region: The name of the currently selected region
+
+    Returns: The dataframe of the selected region, or a dataframe with only a "Trading_Date" column and no rows if the region has no supply points or demand
+    """
+    return region_data.get(selected_region, region_data["New Zealand"][["Trading_Date"]].iloc[:0])
+
+def get_selected_day_profile(profiles, day_index):
+    """
+    Function that gets the average supply or demand profile of the selected weekday, from the matrix returned by get_avg_profiles
+
+    profiles: The (7, number of trading periods) matrix of average profiles, indexed by weekday
+    day_index: The index of the selected weekday (where 0 is Monday)
+
+    Returns: The profile of the selected weekday as a NumPy array, or 48 zeros if the region has no data for that weekday (e.g. no supply points in a region)
+    """
+    day_profile = profiles[day_index]
+
+    if day_profile.size == 0 or np.isnan(day_profile).all():
+        return np.zeros(48)
+
+    return day_profile
+
 
 @st.cache_resource
-def get_ta_region_map(ta_path, _region_gdf):
+def load_region_data(region_path):
     """
-    Function that maps NZ territorial authorities to the given region data
+    Function that loads in the map data for a set of regions, both as a geodataframe (for spatial processing) and as GeoJSON (for displaying the map)
+
+    region_path: The file path to the regions mapping data
+
+    Returns: The region geodataframe, and the region GeoJSON (with a consistent "Region" property for every feature)
+    """
+    region_gdf = gpd.read_file(region_path, engine="pyogrio")
+
+    with open(region_path, encoding="utf-8") as f:
+        region_gj = json.load(f)
+
+    # Rename the territorial authority name property, so that the map tooltips work for both map views
+    for feature in region_gj["features"]:
+        props = feature["properties"]
+        if "TA2025_V_1" in props:
+            props["Region"] = props.pop("TA2025_V_1")
+
+    return region_gdf, region_gj
+
+
+@st.cache_resource
+def get_simplified_region_gdf(region_path):
+    """
+    Function that creates a simplified copy of the region geometries (to around 500m, which is still finer than the map displays them), for drawing
+    the map and finding clicked regions without processing every vertex of the original boundaries
+
+    region_path: The file path to the regions mapping data
+
+    Returns: A geodataframe with a "Region" column and the simplified geometries, in the same order as the rows of the region geodataframe
+    """
+    region_gdf, _ = load_region_data(region_path)
+
+    # Get the column that contains the region names, as the territorial authority data uses its own name property
+    region_col = "TA2025_V_1" if "TA2025_V_1" in region_gdf.columns else "Region"
+
+    return gpd.GeoDataFrame(
+        data = {"Region": region_gdf[region_col].to_numpy()},
+        geometry = region_gdf.geometry.simplify(0.005, preserve_topology=True).to_numpy(),
+        crs = region_gdf.crs
+    )
+
+@st.cache_resource
+def get_region_map(region_path):
+    """
+    Function that creates the (static) interactive Folium map of a set of regions, so that it only has to be built once per map file rather than on every rerun
+
+    region_path: The file path to the regions mapping data
+
+    Returns: The Folium map, with the regions (and a tooltip of their names) drawn on it
+    """
+    simplified_region_gdf = get_simplified_region_gdf(region_path)
+
+    # Create the base map using Folium (drawing the simplified regions, to keep the map data sent to the browser small)
+    region_map = folium.Map(
+            location=[-42.5, 174], 
+            zoom_start=6, 
+            dragging=False,
+            zoom_control=False,
+            scrollWheelZoom=False, 
+            doubleClickZoom=False, 
+        )
+    folium.GeoJson(
+        simplified_region_gdf,
+        tooltip=folium.GeoJsonTooltip(
+            fields=["Region"],
+            aliases=["Region"],
+            localize=True
+        )
+    ).add_to(region_map)
+
+    return region_map
+
+@st.cache_resource
+def get_region_tree(region_path):
+    """
+    Function that builds a spatial index (STRtree) of the region geometries, for quickly finding which region a point on the map lies within
 
-    ta_path: The file path to the territorial authority mapping data
     region_path: The file path to the regions mapping data
 
-    Returns: A processed dictionary representing the final joined data/mapping
+    Returns: An STRtree of the (simplified) region geometries, in the same order as the rows of the region geodataframe
+    """
+    # Use the same simplified geometries that are drawn on the map, so that a click always selects the region that is shown under it
+    simplified_region_gdf = get_simplified_region_gdf(region_path)
+    return shapely.STRtree(simplified_region_gdf.geometry.values)
+
+
+@st.cache_data
+def get_poc_region_lookup(_network_mapping_df, region_path, is_territorial_view):
     """
+    Function that creates a lookup table of the region that each network supply point (POC) lies within, for mapping the generation and demand data to the regions
 
-    # Process the geodataframes then apply the join
-    ta_gdf = gpd.read_file(ta_path).to_crs(epsg=4326)
-    region_gdf = _region_gdf.to_crs(epsg=4326)
-    region_gdf["geometry"] = region_gdf.buffer(0)
+    _network_mapping_df: The network supply points dataframe, with "POC_Code" and NZTM coordinate columns (not hashed by Streamlit, as it is loaded from a static file)
+    region_path: The file path to the regions mapping data
+    is_territorial_view: A bool representing if the current map view has been set to show electricity grid zones or territorial authorities
+
+    Returns: A dataframe with the "POC_Code" and "Region" of every supply point that has known coordinates (with the manual overrides applied in the grid zone view)
+    """
+    # Get the column that contains the region names, depending on the current map view
+    if is_territorial_view == False:
+        region_col = "Region"
+    elif is_territorial_view == True:
+        region_col = "TA2025_V_1"
+
+    region_gdf, _ = load_region_data(region_path)
+
+    # Create a geodataframe of the supply points (ignoring any without coordinates), then map them to the regions using sjoin
+    poc_df = _network_mapping_df[["POC_Code", "NZTM easting", "NZTM northing"]].drop_duplicates(subset="POC_Code").dropna(subset=["NZTM easting", "NZTM northing"])
+    poc_gdf = gpd.GeoDataFrame(
+        data = poc_df[["POC_Code"]],
+        geometry = gpd.points_from_xy(poc_df["NZTM easting"], poc_df["NZTM northing"]),
+        crs = "EPSG:2193"
+    )
+    poc_gdf = poc_gdf.to_crs(epsg=4326)
+
+    result_gdf = gpd.sjoin(poc_gdf, region_gdf[[region_col, "geometry"]], how="left", predicate="within")
+
+    # Handle duplicates, and make the region column name consistent for both map views
+    region_lookup = pd.DataFrame(result_gdf.drop_duplicates(subset="POC_Code")[["POC_Code", region_col]].rename(columns={region_col: "Region"}))
+
+    # Apply the manual overrides (in the grid zone view) directly to the few supply points they cover, so that everything using the lookup gets them
+    if is_territorial_view == False:
+        is_overridden = region_lookup["POC_Code"].isin(list(POC_REGION_OVERRIDES))
+        region_lookup.loc[is_overridden, "Region"] = region_lookup.loc[is_overridden, "POC_Code"].map(POC_REGION_OVERRIDES)
 
-    ta_with_regions = gpd.sjoin(ta_gdf, region_gdf, how="left", predicate="intersects")
+    return region_lookup
+
+
+@st.cache_resource
+def get_supply_by_region(generation_path, _network_mapping_df, region_path, is_territorial_view):
+    """
+    Function that processes the electricity generation data into the total supply of each region per trading date and period, so that the
+    cleaning, region mapping and aggregation only happen once per map view (rather than on every rerun)
+
+    generation_path: The file path to the electricity generation data
+    _network_mapping_df: The network supply points dataframe, with "POC_Code" and NZTM coordinate columns (not hashed by Streamlit, as it is loaded from a static file)
+    region_path: The file path to the regions mapping data
+    is_territorial_view: A bool representing if the current map view has been set to show electricity grid zones or territorial authorities
+
+    Returns: A dictionary mapping each region name (and "New Zealand", for the whole country) to a dataframe with a "Trading_Date" column and a column for
+    the supply (in MWh) of each trading period, with one row per trading date
+    """
+    # Load only the needed columns (skipping the daylight saving trading periods, and with the supply points as categories so that they are only mapped
+    # to regions once each), then convert the trading period units to MWh in a new dataframe (as the loaded dataframe is cached and shared by both map views)
+    generation_df = load_file(generation_path, usecols=["POC_Code", "Trading_Date"] + TP_COLS, dtype={"POC_Code": "category"}, parse_dates=["Trading_Date"])
+    generation_df = generation_df.assign(**{col: generation_df[col] / 1000 for col in TP_COLS})
+
+    # Get the region that each network supply point lies within (including the manual overrides) as a series indexed by supply point
+    region_lookup = get_poc_region_lookup(_network_mapping_df, region_path, is_territorial_view)
+    poc_regions = region_lookup.set_index("POC_Code")["Region"]
+
+    # Map the generation data to the regions with a hash lookup per row (rather than a merge), only keeping the supply points that are in the lookup
+    generation_df = generation_df[generation_df["POC_Code"].isin(poc_regions.index)]
+    generation_regions = generation_df["POC_Code"].map(poc_regions).rename("Region")
+
+    # Get the total supply per region and trading date, keeping supply points without a region so that they still count towards the New Zealand total
+    supply_by_region = generation_df.groupby([generation_regions, "Trading_Date"], dropna=False, observed=True)[TP_COLS].sum()
+
+    # Split the supply into a dataframe per region (and for the whole country), so that selecting a region is just a dictionary lookup
+    region_supply = {region: region_df.droplevel("Region").reset_index() for region, region_df in supply_by_region.groupby(level="Region", observed=True)}
+    region_supply["New Zealand"] = supply_by_region.groupby(level="Trading_Date").sum().reset_index()
+
+    return region_supply
+
+def get_wide_demand(period_demand):
+    """
+    Function that converts the total electricity demand of each trading period into wide format, with one row per trading date and a column for each trading period
+
+    period_demand: A series of the total demand (in GWh), indexed by the "Period start" of each trading period
+
+    Returns: A dataframe with a (datetime) "Trading_Date" column and a column for the demand (in MWh) of each trading period
+    """
+    # Convert the units to MWh and split the period starts into columns for the trading dates and periods, which only happens once per period rather than for every demand row
+    total_demand = (period_demand * 1000).rename("Demand (MWh)").reset_index()
+    period_start_parts = total_demand["Period start"].astype(str).str.split(" ", n=1)
+    total_demand["Trading_Date"] = period_start_parts.str[0]
+    total_demand["Trading_Period"] = period_start_parts.str[1]
+
+    # Convert the demand data to wide format, with each trading date having rows for trading period and demand values, and parse the (unique) trading dates
+    wide_demand = total_demand.pivot(index="Trading_Date", columns="Trading_Period", values="Demand (MWh)").reset_index()
+    wide_demand["Trading_Date"] = pd.to_datetime(wide_demand["Trading_Date"], dayfirst=True)
+
+    return wide_demand
+
+@st.cache_resource
+def get_demand_by_region(data_dir, _network_mapping_df, region_path, is_territorial_view):
+    """
+    Function that processes the electricity demand data into the total demand of each region per trading date and period, so that the
+    region mapping, aggregation and reshaping only happen once per map view (rather than on every rerun)
+
+    data_dir: The directory that contains the data files
+    _network_mapping_df: The network supply points dataframe, with "POC_Code" and NZTM coordinate columns (not hashed by Streamlit, as it is loaded from a static file)
+    region_path: The file path to the regions mapping data
+    is_territorial_view: A bool representing if the current map view has been set to show electricity grid zones or territorial authorities
+
+    Returns: A dictionary mapping each region name (and "New Zealand", for the whole country) to a dataframe with a "Trading_Date" column and a column for
+    the demand (in MWh) of each trading period, with one row per trading date
+    """
+    demand_df = load_demand_data(data_dir, is_territorial_view)
+
+    # Get the region of each demand row - the grid zone demand already has one, whereas the network node demand is mapped to the territorial authorities
+    # using the lookup of the region that each network supply point lies within (only keeping the nodes that are in the network supply points table)
+    if is_territorial_view == False:
+        demand_regions = demand_df["Region"]
+    elif is_territorial_view == True:
+        region_lookup = get_poc_region_lookup(_network_mapping_df, region_path, is_territorial_view)
+        demand_df = demand_df[demand_df["Region ID"].isin(_network_mapping_df["POC_Code"])]
+        demand_regions = demand_df["Region ID"].map(region_lookup.set_index("POC_Code")["Region"]).rename("Region")
+
+    # Get the total demand per region and trading period, keeping demand without a region so that it still counts towards the New Zealand total
+    demand_by_region = demand_df.groupby([demand_regions, "Period start"], dropna=False, observed=True)["Demand (GWh)"].sum()
+
+    # Split the demand into a wide dataframe per region (and for the whole country), so that selecting a region is just a dictionary lookup
+    region_demand = {region: get_wide_demand(region_df.droplevel("Region")) for region, region_df in demand_by_region.groupby(level="Region", observed=True)}
+    region_demand["New Zealand"] = get_wide_demand(demand_by_region.groupby(level="Period start", observed=True).sum())
+
+    return region_demand
+
+@st.cache_resource
+def get_ta_region_map(ta_path, region_path, _region_gdf):
+    """
+    Function that maps NZ territorial authorities to the given region data
+
+    ta_path: The file path to the territorial authority mapping data
+    region_path: The file path to the regions mapping data that the region geodataframe was read from
+    _region_gdf: The geodataframe of the regions to map to (not hashed by Streamlit, as it is identified by the region path)
+
+    Returns: A processed series (indexed by territorial authority) representing the final joined data/mapping
+    """
+    # Reuse the saved mapping if it is up-to-date with both map files, as they are static and this skips the spatial processing entirely on a warm start
+    cache_path = f"{ta_path}.overlap.ta_region_map.json"
+    try:
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= max(os.path.getmtime(ta_path), os.path.getmtime(region_path)):
+            with open(cache_path, encoding="utf-8") as f:
+                return pd.Series(json.load(f), dtype=object)
+    except CACHE_READ_ERRORS as e:
+        warnings.warn(f"Could not read the saved mapping of {ta_path}, so the territorial authorities will be mapped again: {e}")
+
+    # Process the geodataframes (only reading and keeping the columns that are needed for the mapping), projecting them straight to NZTM so that the
+    # overlap areas are in square metres rather than degrees, and repairing any invalid geometries so that they can be intersected
+    ta_gdf = gpd.read_file(ta_path, engine="pyogrio", columns=["TA2025_V_2"]).to_crs(epsg=2193)
+    ta_gdf["geometry"] = ta_gdf.geometry.make_valid()
+
+    region_gdf = _region_gdf[["Region", "geometry"]].to_crs(epsg=2193)
+    region_gdf["geometry"] = region_gdf.geometry.make_valid()
+
+    # Find the candidate regions of each territorial authority with a spatial index of the regions, so that only the pairs with overlapping bounding
+    # boxes are tested exactly (and without building the full overlay geodataframe)
+    ta_geoms = ta_gdf.geometry.to_numpy()
+    region_geoms = region_gdf.geometry.to_numpy()
+    ta_idxs, region_idxs = shapely.STRtree(region_geoms).query(ta_geoms, predicate="intersects")
+    ta_candidates = pd.DataFrame({"ta": ta_idxs, "region": region_idxs})
+
+    # Assign each territorial authority to the region that it overlaps the most, so that authorities that straddle a region boundary are mapped deterministically,
+    # only computing the overlap areas for authorities with more than one candidate region (as most lie entirely within a single region) - the authorities with
+    # a single candidate only need to check that their interiors intersect, which is cheaper than building the intersection
+    is_shared = ta_candidates["ta"].duplicated(keep=False).to_numpy()
+    overlap_areas = np.zeros(len(ta_candidates))
+    overlap_areas[is_shared] = shapely.area(shapely.intersection(ta_geoms[ta_idxs[is_shared]], region_geoms[region_idxs[is_shared]]))
+    overlap_areas[~is_shared] = np.where(shapely.relate_pattern(ta_geoms[ta_idxs[~is_shared]], region_geoms[region_idxs[~is_shared]], "T********"), np.inf, 0)
+    ta_candidates["area"] = overlap_areas
+
+    # Ignore regions that only touch the authority along its boundary (as the spatial index query also returns these), which have no overlap area
+    ta_candidates = ta_candidates[ta_candidates["area"] > 0]
+    ta_with_regions = ta_candidates.loc[ta_candidates.groupby("ta")["area"].idxmax()]
+    ta_with_regions = pd.DataFrame({
+        "TA2025_V_2": ta_gdf["TA2025_V_2"].to_numpy()[ta_with_regions["ta"].to_numpy()],
+        "Region": region_gdf["Region"].to_numpy()[ta_with_regions["region"].to_numpy()]
+    })
+
+    # Handle uppercase words in the columns/data using vectorised string operations, keeping the last region for any territorial authority names that only differ by case
+    ta_region_map = pd.Series(ta_with_regions["Region"].str.upper().to_numpy(), index=ta_with_regions["TA2025_V_2"].str.upper().to_numpy())
+    ta_region_map = ta_region_map[~ta_region_map.index.duplicated(keep="last")]
+
+    # Save the mapping for future startups (failing to do so should not prevent the mapping from being used)
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(ta_region_map.to_dict(), f)
+    except CACHE_WRITE_ERRORS as e:
+        warnings.warn(f"Could not save the mapping of {ta_path}: {e}")
 
-    # Handle uppercase words in the columns/data
-    ta_region_map = dict(zip(ta_with_regions["TA2025_V_2"], ta_with_regions["Region"]))
-    return {k.upper(): v.upper() for k, v in ta_region_map.items()}
+    return ta_region_map
 
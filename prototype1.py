@@ -13,21 +13,33 @@ st.title("Interactive Electricity Grid Model - Prototype 1")
 
 # Get the relevant data paths/files
 data_dir = "Data/"
-fleet_data_2025 = helper.load_file(f"{data_dir}Fleet-31Mar2025.csv")
+fleet_data_2025 = helper.load_file(
+    f"{data_dir}Fleet-31Mar2025.csv",
+    usecols=["INDUSTRY_CLASS", "MOTIVE_POWER", "MAKE", "MODEL", "VEHICLE_YEAR"],
+    dtype={"VEHICLE_YEAR": "Int16", "MOTIVE_POWER": "category", "INDUSTRY_CLASS": "category", "MAKE": "category", "MODEL": "category"}
+)
 electricity_demand_ytd = helper.load_file(f"{data_dir}Zone Load Data (16 Mar - 16 Apr) [30 intervals].csv")
 
-# Filter and process the data
-private_vehicles = fleet_data_2025.loc[fleet_data_2025["INDUSTRY_CLASS"] == "PRIVATE"]
-electric_vehicles = fleet_data_2025.loc[fleet_data_2025["MOTIVE_POWER"] == "ELECTRIC"]
+# Filter and process the data, counting the vehicles of each industry class and motive power in a single pass per column
+industry_class_counts = fleet_data_2025["INDUSTRY_CLASS"].value_counts()
+motive_power_counts = fleet_data_2025["MOTIVE_POWER"].value_counts()
+
+num_private_vehicles = industry_class_counts.get("PRIVATE", 0)
+num_electric_vehicles = motive_power_counts.get("ELECTRIC", 0)
+
+electric_vehicles = fleet_data_2025.loc[fleet_data_2025["MOTIVE_POWER"] == "ELECTRIC", ["MAKE", "MODEL", "VEHICLE_YEAR"]]
 
-electric_vehicles["MAKE_MODEL"] = electric_vehicles["MAKE"] + " " + electric_vehicles["MODEL"]
+# Get the most common EV and year in the dataset, by counting each make and model combination (without building a combined make/model column), where
+# ties are broken by the alphabetically first "MAKE MODEL" name (as the mode of the combined names would give)
+ev_model_counts = electric_vehicles.groupby(["MAKE", "MODEL"], observed=True).size()
+top_ev_models = ev_model_counts.index[ev_model_counts == ev_model_counts.max()]
+most_common_make, most_common_model = min(top_ev_models, key=lambda make_model: f"{make_model[0]} {make_model[1]}")
+most_common_ev = f"{most_common_make} {most_common_model}"
 
-# Get the most common EV and year in the dataset
-most_common_ev = electric_vehicles["MAKE_MODEL"].mode()[0]
-year_common_ev = electric_vehicles[electric_vehicles["MAKE_MODEL"] == most_common_ev]["VEHICLE_YEAR"].mode()[0]
+year_common_ev = electric_vehicles.loc[(electric_vehicles["MAKE"] == most_common_make) & (electric_vehicles["MODEL"] == most_common_model), "VEHICLE_YEAR"].mode().iat[0]
 
 # Get electricity demand stats
-average_hourly_usage_mw = electricity_demand_ytd["NZ TOTAL(MW)"].sum() / electricity_demand_ytd["Date"].count()
+average_hourly_usage_mw = electricity_demand_ytd["NZ TOTAL(MW)"].mean()
 average_daily_usage_gw = average_hourly_usage_mw * 24 / 1000
 
 
@@ -40,18 +52,14 @@ st.markdown(
     """
 )
 
-st.write(f"There are {private_vehicles.shape[0]} private vehicles registered in NZ as of 2025")
+st.write(f"There are {num_private_vehicles} private vehicles registered in NZ as of 2025")
 
-st.write(f"There are {electric_vehicles.shape[0]} battery electric vehicles registered in NZ as of 2025")
+st.write(f"There are {num_electric_vehicles} battery electric vehicles registered in NZ as of 2025")
 
 st.write(f"The average daily usage was {round(average_daily_usage_gw, 2)} GW")
 
 st.write(f"The most common EV is the {year_common_ev} {most_common_ev}")
 
-print(fleet_data_2025["INDUSTRY_CLASS"].unique())
-
-print(fleet_data_2025["MOTIVE_POWER"].unique())
-
 # Plot Electricity Demand vs Supply
 if not fleet_data_2025.empty and not electricity_demand_ytd.empty:
     chart_data = pd.DataFrame({
@@ -0,0 +1,107 @@
+"""
+Python file that contains the shared fixtures for the tests of the helper functions, which write small versions of the data files to a temporary directory
+"""
+
+# Import the necessary libraries/packages
+import os
+import sys
+import json
+import pandas as pd
+import pytest
+import streamlit as st
+from pyproj import Transformer
+
+# Make the helper module (in the directory above the tests) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import helper
+
+# The longitude ranges of the test regions, which are side-by-side squares between latitudes -44 and -43 (where "Region C" has no supply points or demand)
+REGION_LONGITUDES = {"Region A": (172, 173), "Region B": (173, 174), "Region C": (174, 175)}
+
+# The (longitude, latitude) location of each test supply point, and its generation (in kWh) in every trading period
+POC_LOCATIONS = {"AAA0001": (172.5, -43.5), "BBB0001": (173.5, -43.5)}
+POC_GENERATION = {"AAA0001": 8000.0, "BBB0001": 4000.0}
+
+def write_region_file(path, name_property, region_longitudes=REGION_LONGITUDES):
+    """
+    Function that writes a set of test regions to a GeoJSON file, with the region names stored in the given property
+
+    path: The file path to write the regions to
+    name_property: The name of the property that stores the region names (e.g. "Region" for grid zones, or "TA2025_V_1" for territorial authorities)
+    region_longitudes: A dictionary mapping each region name to the (west, east) longitudes of its square, which default to the test regions
+    """
+    features = [
+        {
+            "type": "Feature",
+            "properties": {name_property: region},
+            "geometry": {"type": "Polygon", "coordinates": [[[west, -44], [east, -44], [east, -43], [west, -43], [west, -44]]]}
+        }
+        for region, (west, east) in region_longitudes.items()
+    ]
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+def write_demand_file(path, region_col, regions):
+    """
+    Function that writes a test demand file (with the 11 header rows of the real files) for a Monday, with 1 GWh of demand per trading period for each region
+
+    path: The file path to write the demand data to
+    region_col: The name of the column that identifies the region of each row
+    regions: The regions (or network nodes) to write demand for
+    """
+    demand_df = pd.DataFrame(
+        [(f"03/03/2025 {time}", region, 1.0) for region in regions for time in helper.HALF_HOUR_TIMES],
+        columns=["Period start", region_col, "Demand (GWh)"]
+    )
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("header\n" * 11)
+        demand_df.to_csv(f, index=False)
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    Fixture that clears the Streamlit caches before every test, so that the cached helper functions are always run on the data of the current test
+    """
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """
+    Fixture that writes the test grid zone, territorial authority, generation and demand files to a temporary directory
+
+    Returns: The path to the directory (ending with a separator, as in the prototypes)
+    """
+    write_region_file(tmp_path / "zones.json", "Region")
+    write_region_file(tmp_path / "tas.json", "TA2025_V_1")
+
+    # Write a day of generation for each supply point (on Monday 3 March 2025), including the daylight saving trading periods which should be ignored
+    generation_df = pd.DataFrame(
+        [[poc, "2025-03-03"] + [generation] * 50 for poc, generation in POC_GENERATION.items()],
+        columns=["POC_Code", "Trading_Date"] + [f"TP{i}" for i in range(1, 51)]
+    )
+    generation_df.to_csv(tmp_path / "generation.csv", index=False)
+
+    write_demand_file(tmp_path / "Demand_trends_zone_202503.csv", "Region", ["Region A", "Region B"])
+    write_demand_file(tmp_path / "Demand_trends_node_202503.csv", "Region ID", list(POC_LOCATIONS))
+
+    return f"{tmp_path}{os.sep}"
+
+@pytest.fixture
+def network_mapping_df():
+    """
+    Fixture that creates the test network supply points dataframe, with the NZTM coordinates of each supply point
+
+    Returns: A dataframe with "POC_Code", "NZTM easting" and "NZTM northing" columns
+    """
+    to_nztm = Transformer.from_crs("EPSG:4326", "EPSG:2193", always_xy=True)
+    coords = [to_nztm.transform(lon, lat) for lon, lat in POC_LOCATIONS.values()]
+
+    return pd.DataFrame({
+        "POC_Code": list(POC_LOCATIONS),
+        "NZTM easting": [easting for easting, _ in coords],
+        "NZTM northing": [northing for _, northing in coords]
+    })
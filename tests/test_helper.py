@@ -0,0 +1,244 @@
+"""
+Python file that contains tests for the helper functions, run using pytest
+"""
+
+# Import the necessary libraries/packages
+import os
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+import helper
+from conftest import write_region_file
+
+# The arguments that the generation file is loaded with by get_supply_by_region
+GENERATION_LOAD_ARGS = {"usecols": ["POC_Code", "Trading_Date"] + helper.TP_COLS, "dtype": {"POC_Code": "category"}, "parse_dates": ["Trading_Date"]}
+
+def test_get_supply_by_region_does_not_modify_cached_generation(data_dir, network_mapping_df):
+    # Get the supply for both map views, which share the same cached generation dataframe
+    zone_supply = helper.get_supply_by_region(f"{data_dir}generation.csv", network_mapping_df, f"{data_dir}zones.json", False)
+    ta_supply = helper.get_supply_by_region(f"{data_dir}generation.csv", network_mapping_df, f"{data_dir}tas.json", True)
+
+    generation_df = helper.load_file(f"{data_dir}generation.csv", **GENERATION_LOAD_ARGS)
+
+    assert (generation_df.loc[generation_df["POC_Code"] == "AAA0001", helper.TP_COLS] == 8000.0).all().all()
+    assert (zone_supply["Region A"][helper.TP_COLS] == 8.0).all().all()
+    assert (ta_supply["Region A"][helper.TP_COLS] == 8.0).all().all()
+    assert (ta_supply["New Zealand"][helper.TP_COLS] == 12.0).all().all()
+
+def test_region_without_supply_gets_zero_profile(data_dir, network_mapping_df):
+    # Region C has no supply points, so it has no entry in the supply dictionary and should fall back to an empty dataframe with a zero profile
+    region_supply = helper.get_supply_by_region(f"{data_dir}generation.csv", network_mapping_df, f"{data_dir}tas.json", True)
+    assert "Region C" not in region_supply
+
+    supply_by_date_period = helper.get_selected_region_data(region_supply, "Region C")
+    assert list(supply_by_date_period.columns) == ["Trading_Date"]
+    assert supply_by_date_period.empty
+
+    supply_matrix = helper.get_profile_matrix(supply_by_date_period)
+    supply_profiles = helper.get_weekday_profiles(*supply_matrix)
+    assert (helper.get_selected_day_profile(supply_profiles, 0) == 0).all()
+    assert helper.get_selected_day_profile(supply_profiles, 0).shape == (48,)
+
+def test_region_without_demand_gets_zero_profile(data_dir, network_mapping_df):
+    for region_path, is_territorial_view in [(f"{data_dir}zones.json", False), (f"{data_dir}tas.json", True)]:
+        region_demand = helper.get_demand_by_region(data_dir, network_mapping_df, region_path, is_territorial_view)
+        assert "Region C" not in region_demand
+
+        wide_demand = helper.get_selected_region_data(region_demand, "Region C")
+        demand_profiles = helper.get_weekday_profiles(*helper.get_profile_matrix(wide_demand))
+        assert (helper.get_selected_day_profile(demand_profiles, 0) == 0).all()
+
+        # The regions with demand have it on the Monday only (in MWh)
+        region_a_profiles = helper.get_weekday_profiles(*helper.get_profile_matrix(helper.get_selected_region_data(region_demand, "Region A")))
+        assert (helper.get_selected_day_profile(region_a_profiles, 0) == 1000).all()
+
+def test_weekday_without_data_gets_zero_profile(data_dir, network_mapping_df):
+    # The test generation is all on a Monday, so every other weekday of Region A's profile is missing and should be zeros rather than NaN
+    region_supply = helper.get_supply_by_region(f"{data_dir}generation.csv", network_mapping_df, f"{data_dir}zones.json", False)
+    supply_profiles = helper.get_weekday_profiles(*helper.get_profile_matrix(region_supply["Region A"]))
+
+    assert (helper.get_selected_day_profile(supply_profiles, 0) == 8.0).all()
+    assert (helper.get_selected_day_profile(supply_profiles, 1) == 0).all()
+
+def test_get_region_fleet_counts_with_no_heavy_vehicles():
+    # Region A only has light vehicles (one of which is electric), whereas Region B has both light and heavy vehicles
+    fleet_df = pd.DataFrame({
+        "GROSS_VEHICLE_MASS": np.array([1500, 2000, 1800, 12000], dtype=np.float32),
+        "REGION": pd.Categorical(["REGION A", "REGION A", "REGION B", "REGION B"]),
+        "TLA": pd.Categorical(["TA A", "TA A", "TA B", "TA B"]),
+        "_electric": [True, False, False, True]
+    })
+    region_fleet_counts = helper.get_region_fleet_counts(helper.build_region_fleet_summary(fleet_df, "fleet.csv", False), False)
+
+    assert region_fleet_counts["REGION A"] == (1, 0, 1, 0)
+    assert region_fleet_counts["REGION B"] == (0, 1, 1, 0)
+    assert region_fleet_counts["NEW ZEALAND"] == (1, 1, 2, 0)
+
+    # The heavy EV share of a region without heavy vehicles should be 0 rather than raising an error
+    light_evs, heavy_evs, light_combustion, heavy_combustion = region_fleet_counts["REGION A"]
+    assert helper.get_percentage(light_evs, light_evs + light_combustion) == 50.0
+    assert helper.get_percentage(heavy_evs, heavy_evs + heavy_combustion) == 0.0
+
+def test_load_file_types_match_with_and_without_parquet_copy(tmp_path):
+    pd.DataFrame({"MAKE": ["TESLA", "NISSAN"], "VEHICLE_YEAR": [2020, None], "MASS": [1800.5, 1500.0]}).to_csv(tmp_path / "fleet.csv", index=False)
+    load_args = {"usecols": ["MAKE", "VEHICLE_YEAR", "MASS"], "dtype": {"MAKE": "category", "VEHICLE_YEAR": "Int16"}}
+
+    # Load the file once from the CSV (which saves the Parquet copy), then again from the Parquet copy
+    cold_df = helper.load_file(str(tmp_path / "fleet.csv"), **load_args)
+    helper.load_file.clear()
+    warm_df = helper.load_file(str(tmp_path / "fleet.csv"), **load_args)
+
+    assert list(tmp_path.glob("fleet.csv.*.parquet"))
+    assert cold_df.dtypes.to_dict() == warm_df.dtypes.to_dict()
+    pd.testing.assert_frame_equal(cold_df, warm_df)
+
+def test_load_file_replaces_corrupt_parquet_copy(tmp_path):
+    pd.DataFrame({"A": [1, 2], "B": ["x", "y"]}).to_csv(tmp_path / "data.csv", index=False)
+    helper.load_file(str(tmp_path / "data.csv"))
+    helper.load_file.clear()
+
+    # Corrupt the Parquet copy, which should be warned about, then replaced by the parsed CSV file
+    (cache_path,) = tmp_path.glob("data.csv.*.parquet")
+    with open(cache_path, "wb") as f:
+        f.write(b"not parquet")
+
+    with pytest.warns(UserWarning, match="Parquet copy"):
+        df = helper.load_file(str(tmp_path / "data.csv"))
+
+    assert df["A"].tolist() == [1, 2]
+    assert pd.read_parquet(cache_path)["B"].tolist() == ["x", "y"]
+
+def test_load_file_warns_about_invalid_columns(tmp_path):
+    pd.DataFrame({"A": [1, 2]}).to_csv(tmp_path / "data.csv", index=False)
+
+    with pytest.warns(UserWarning, match="PyArrow engine"):
+        df = helper.load_file(str(tmp_path / "data.csv"), usecols=["A", "MISSING"])
+
+    assert df.empty
+
+def test_load_file_skips_header_rows_without_warnings(tmp_path):
+    with open(tmp_path / "data.csv", "w", encoding="utf-8") as f:
+        f.write("title\nnotes\nA,B\n1,x\n")
+
+    # Files with rows to skip should be parsed (by the C engine) without any warnings about falling back from PyArrow
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", UserWarning)
+        df = helper.load_file(str(tmp_path / "data.csv"), 2, usecols=["A"])
+
+    assert df["A"].tolist() == [1]
+
+def test_load_file_parquet_copy_depends_on_every_argument(tmp_path):
+    pd.DataFrame({"A": [1, 2], "B": ["x", "y"]}).to_csv(tmp_path / "data.csv", index=False)
+
+    # Loading the file with different arguments should save (and use) a separate Parquet copy for each
+    all_columns_df = helper.load_file(str(tmp_path / "data.csv"))
+    one_column_df = helper.load_file(str(tmp_path / "data.csv"), usecols=["A"])
+    typed_df = helper.load_file(str(tmp_path / "data.csv"), dtype={"B": "category"})
+    helper.load_file.clear()
+
+    assert len(list(tmp_path.glob("data.csv.*.parquet"))) == 3
+    assert list(helper.load_file(str(tmp_path / "data.csv"), usecols=["A"]).columns) == list(one_column_df.columns) == ["A"]
+    assert list(helper.load_file(str(tmp_path / "data.csv")).columns) == list(all_columns_df.columns) == ["A", "B"]
+    assert isinstance(helper.load_file(str(tmp_path / "data.csv"), dtype={"B": "category"})["B"].dtype, pd.CategoricalDtype)
+    assert isinstance(typed_df["B"].dtype, pd.CategoricalDtype)
+
+def test_count_fleet_categories_matches_pandas():
+    rng = np.random.default_rng(0)
+    region_codes = rng.integers(0, 5, size=1000)
+    electric = rng.random(1000) < 0.2
+    heavy = rng.random(1000) < 0.3
+
+    # Region 4 is left without any heavy electric vehicles, and region 5 has no vehicles at all
+    electric[(region_codes == 4) & heavy] = False
+    counts = helper.count_fleet_categories(region_codes, electric, heavy, 6)
+
+    expected = pd.crosstab(region_codes, [electric, heavy]).reindex(index=range(6), columns=pd.MultiIndex.from_product([[False, True], [False, True]]), fill_value=0)
+    assert counts.shape == (6, 4)
+    assert (counts == expected.to_numpy()).all()
+    assert counts[4, 3] == 0
+    assert (counts[5] == 0).all()
+
+def test_load_file_handles_missing_file(tmp_path):
+    with pytest.warns(UserWarning, match="PyArrow engine"):
+        df = helper.load_file(str(tmp_path / "missing.csv"))
+
+    assert df.empty
+
+def test_get_weekday_profiles_matches_pandas():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2025-03-01", periods=20, freq="D")
+    values = rng.random((20, 48)).astype(np.float32)
+    values[rng.random((20, 48)) < 0.1] = np.nan
+
+    # Leave all of Wednesday's values missing, which should give a NaN profile (rather than zeros or an error)
+    values[dates.dayofweek == 2] = np.nan
+
+    profile_df = pd.DataFrame(values, columns=helper.TP_COLS).assign(Trading_Date=dates)
+    day_of_week, matrix = helper.get_profile_matrix(profile_df)
+    profiles = helper.get_weekday_profiles(day_of_week, matrix)
+
+    expected = profile_df.groupby(dates.dayofweek)[helper.TP_COLS].mean().to_numpy()
+    assert (day_of_week == dates.dayofweek.to_numpy()).all()
+    assert profiles.shape == (7, 48)
+    np.testing.assert_allclose(profiles, expected, rtol=1e-6)
+    assert np.isnan(profiles[2]).all()
+
+def test_get_cleaned_fleet_df_matches_with_and_without_saved_copy(tmp_path):
+    pd.DataFrame({
+        "MOTIVE_POWER": ["ELECTRIC", "PETROL", "OTHER", "PLUGIN PETROL HYBRID"],
+        "GROSS_VEHICLE_MASS": [1800, 2000, 1500, 2200],
+        "TLA": ["TA A", "TA B", "TA A", "UNKNOWN"]
+    }).to_csv(tmp_path / "fleet.csv", index=False)
+    ta_region_map = pd.Series({"TA A": "REGION A", "TA B": "REGION B"})
+
+    # Clean the fleet data once (which saves the cleaned copy), then again from the saved copy, where the "OTHER" and unmapped vehicles are removed
+    cold_df = helper.get_cleaned_fleet_df(str(tmp_path / "fleet.csv"), ta_region_map)
+    helper.get_cleaned_fleet_df.clear()
+    warm_df = helper.get_cleaned_fleet_df(str(tmp_path / "fleet.csv"), ta_region_map)
+
+    assert cold_df["REGION"].tolist() == ["REGION A", "REGION B"]
+    assert cold_df["_electric"].tolist() == [True, False]
+    pd.testing.assert_frame_equal(cold_df, warm_df)
+
+def test_get_ta_region_map_assigns_largest_overlap(data_dir, tmp_path):
+    # TA X lies within Region A, TA Y overlaps Region A slightly but mostly Region B, TA Z covers Region C (only touching Region B along its boundary),
+    # and TA W lies outside every region (only touching Region C along its boundary)
+    write_region_file(tmp_path / "ta_mapping.json", "TA2025_V_2", {"TA X": (172.0, 172.9), "TA Y": (172.8, 174.0), "TA Z": (174.0, 175.0), "TA W": (175.0, 176.0)})
+    zone_gdf, _ = helper.load_region_data(f"{data_dir}zones.json")
+
+    # Map the territorial authorities once (which saves the mapping), then again from the saved mapping
+    cold_map = helper.get_ta_region_map(str(tmp_path / "ta_mapping.json"), f"{data_dir}zones.json", zone_gdf)
+    helper.get_ta_region_map.clear()
+    warm_map = helper.get_ta_region_map(str(tmp_path / "ta_mapping.json"), f"{data_dir}zones.json", zone_gdf)
+
+    assert cold_map.to_dict() == {"TA X": "REGION A", "TA Y": "REGION B", "TA Z": "REGION C"}
+    assert warm_map.to_dict() == cold_map.to_dict()
+
+def test_get_ta_region_map_is_updated_with_region_file(data_dir, tmp_path):
+    write_region_file(tmp_path / "ta_mapping.json", "TA2025_V_2", {"TA Y": (172.8, 174.0)})
+    zone_gdf, _ = helper.load_region_data(f"{data_dir}zones.json")
+    assert helper.get_ta_region_map(str(tmp_path / "ta_mapping.json"), f"{data_dir}zones.json", zone_gdf).to_dict() == {"TA Y": "REGION B"}
+
+    # Move the boundary between Regions A and B so that TA Y mostly overlaps Region A, making the region file newer than the saved mapping
+    write_region_file(f"{data_dir}zones.json", "Region", {"Region A": (172, 173.8), "Region B": (173.8, 174), "Region C": (174, 175)})
+    saved_mtime = os.path.getmtime(tmp_path / "ta_mapping.json.overlap.ta_region_map.json")
+    os.utime(f"{data_dir}zones.json", (saved_mtime + 10, saved_mtime + 10))
+    st.cache_resource.clear()
+
+    zone_gdf, _ = helper.load_region_data(f"{data_dir}zones.json")
+    assert helper.get_ta_region_map(str(tmp_path / "ta_mapping.json"), f"{data_dir}zones.json", zone_gdf).to_dict() == {"TA Y": "REGION A"}
+
+def test_load_file_chunked_filters_and_restores_categories(tmp_path):
+    pd.DataFrame({"TLA": ["TA A", "TA B", "TA A", "TA C", "TA B"], "MASS": [1, 2, 3, 4, 5]}).to_csv(tmp_path / "fleet.csv", index=False)
+
+    # Read in chunks of 2 rows, so that each chunk has its own categories, and only keep the rows with an even mass
+    df = helper.load_file_chunked(str(tmp_path / "fleet.csv"), lambda chunk: chunk[chunk["MASS"] % 2 == 0], chunksize=2, dtype={"TLA": "category"})
+
+    assert df["MASS"].tolist() == [2, 4]
+    assert isinstance(df["TLA"].dtype, pd.CategoricalDtype)
+    assert df["TLA"].tolist() == ["TA B", "TA C"]
+
+def test_load_file_chunked_handles_missing_file(tmp_path):
+    assert helper.load_file_chunked(str(tmp_path / "missing.csv"), lambda chunk: chunk).empty